@@ -0,0 +1,34 @@
+import hashlib
+from pathlib import Path
+
+from _diagram_settings import DIAGRAM_FORMATS
+
+
+# The rendering code is part of every spec: editing a primitive or a generator
+# re-renders everything. (File mtimes would miss this after a fresh checkout.)
+_SOURCE_DIGEST = hashlib.blake2b(
+    b"".join(path.read_bytes() for path in sorted(Path(__file__).parent.glob("*.py"))), digest_size=16
+).hexdigest()
+
+
+def output_paths(output_path):
+    return [output_path.with_suffix(f".{fmt}") for fmt in DIAGRAM_FORMATS]
+
+
+# Each rendered diagram gets a sidecar "<name>.hash" holding the digest of the
+# spec it was rendered from. Delete the sidecar to force a re-render.
+def spec_digest(*spec):
+    return hashlib.blake2b(repr((_SOURCE_DIGEST, spec)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _digest_path(outputs):
+    return outputs[0].with_suffix(".hash")
+
+
+def is_current(outputs, digest):
+    digest_path = _digest_path(outputs)
+    return all(path.exists() for path in outputs) and digest_path.exists() and digest_path.read_text() == digest
+
+
+def record_digest(outputs, digest):
+    _digest_path(outputs).write_text(digest)
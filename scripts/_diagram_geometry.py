@@ -0,0 +1,15 @@
+# Arrow geometry shared by draw_arrows() and the Pillow renderer, in points
+# with y pointing up.
+
+
+# "-|>" head: as long as the mutation scale allows plus the stroke around it,
+# and half as wide as it is long.
+def arrow_head(mutation_scale, linewidth):
+    length = mutation_scale * 0.4 + linewidth
+    return length, length / 2
+
+
+# arc3: the control point sits off the chord midpoint by rad * chord, a quarter
+# turn clockwise.
+def arc3_control(x0, y0, x1, y1, rad):
+    return (x0 + x1) / 2 + rad * (y1 - y0), (y0 + y1) / 2 - rad * (x1 - x0)
@@ -0,0 +1,34 @@
+import io
+import os
+
+from PIL import Image
+
+from _diagram_settings import PALETTE_COLORS, PNG_COMPRESS_LEVEL
+
+
+RASTER_FORMATS = ("png", "webp")
+
+
+def encode_image(image, fmt):
+    # The diagrams are flat colours plus antialiased edges, so a small fixed
+    # palette keeps them visually identical while writing well under half the
+    # bytes of 24-bit RGB. No dithering: it only adds noise the compressor
+    # pays for.
+    image = image.convert("RGB")
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", lossless=True, quality=0, method=0)
+    else:
+        # Median cut keeps the large flat areas exact; max coverage shifted
+        # them by up to 12 levels.
+        image = image.quantize(colors=PALETTE_COLORS, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+        image.save(buffer, "PNG", optimize=False, compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+
+def write_atomic(output_path, data):
+    # Write next to the target and swap it in, so readers never see a
+    # half-written file.
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, output_path)
@@ -0,0 +1,354 @@
+import functools
+import io
+
+import matplotlib
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PatchCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import BoxStyle, Ellipse, FancyBboxPatch, PathPatch, Rectangle
+from matplotlib.path import Path
+from matplotlib.transforms import Affine2D
+from PIL import Image
+
+from _diagram_geometry import arc3_control, arrow_head
+from _diagram_image import RASTER_FORMATS, encode_image, write_atomic
+from _diagram_settings import BOX_EDGE, DIAGRAM_DPI, GRID_RASTER, PAD_INCHES, PROPOSAL_STYLE, TEXT
+
+
+# The diagrams are plain text only: skip the mathtext scan on every label
+# (and never fall back to LaTeX if a "$" slips into a spec).
+matplotlib.rcParams.update({"text.usetex": False, "mathtext.default": "regular", "text.parse_math": False})
+
+# Stable element ids in SVG output, so (with no Date in the metadata below)
+# unchanged diagrams produce byte-identical SVGs.
+matplotlib.rcParams["svg.hashsalt"] = "clio-diagrams"
+
+SAVE_OPTIONS = {"svg": {"metadata": {"Date": None}}}
+
+
+# A handful of size/weight pairs cover every label; each pair's FontProperties
+# is built once here. ax.text still copies it, and findfont caches by value, so
+# this only spares the call sites repeating the pair.
+@functools.lru_cache(maxsize=None)
+def _font(size, weight="normal"):
+    return FontProperties(size=size, weight=weight)
+
+
+# All labels sit inside the axes, so skip the per-draw clip to the axes box.
+# (Math parsing is already off for every label through text.parse_math.)
+def _label(ax, x, y, text, **kwargs):
+    return ax.text(x, y, text, clip_on=False, **kwargs)
+
+
+# Box styles are built once and shared; passing the spec string makes every
+# FancyBboxPatch parse it again.
+_BOX_STYLE = BoxStyle.Round(pad=0.012, rounding_size=0.015)
+_PANEL_STYLE = BoxStyle.Round(pad=0.01, rounding_size=0.02)
+
+
+# Subtle square grid similar to architecture tools: 51 vertical then 51
+# horizontal segments across the unit axes. Built once; every grid collection
+# shares the (read-only) array.
+def _grid_segments(steps=50):
+    p = np.linspace(0, 1, steps + 1)
+    segments = np.empty((2 * (steps + 1), 2, 2))
+    segments[: steps + 1, :, 0] = p[:, None]
+    segments[: steps + 1, :, 1] = (0, 1)
+    segments[steps + 1 :, :, 0] = (0, 1)
+    segments[steps + 1 :, :, 1] = p[:, None]
+    segments.flags.writeable = False
+    return segments
+
+
+_GRID_SEGMENTS = _grid_segments()
+
+
+# Diagrams are rendered one after another, so each process keeps a single
+# figure and axes and clears the axes between diagrams instead of allocating
+# a new figure, Agg canvas and axes (with its spines and tickers) per diagram.
+# The figure is attached to an Agg canvas directly: output is PNG/SVG only, so
+# pyplot (its backend selection and figure-manager registry) is never loaded.
+_figure = None
+
+
+# figsize is the exact output size. The axes fill it except for a fixed pad,
+# so nothing ever needs measuring or cropping at save time.
+def make_canvas(title, subtitle="", figsize=(12.6, 6.36), dpi=DIAGRAM_DPI, style=PROPOSAL_STYLE):
+    global _figure
+    if _figure is None:
+        _figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(_figure)
+        ax = _figure.add_subplot()
+    else:
+        _figure.set_size_inches(figsize)
+        _figure.set_dpi(dpi)
+        ax = _figure.axes[0]
+        ax.clear()
+    fig = _figure
+    width, height = figsize
+    fig.subplots_adjust(
+        left=PAD_INCHES / width,
+        bottom=PAD_INCHES / height,
+        right=1 - PAD_INCHES / width,
+        top=1 - PAD_INCHES / height,
+    )
+    fig.patch.set_facecolor(style["background"])
+    ax.set_facecolor(style["background"])
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis("off")
+
+    if style["grid"]:
+        # One collection keeps it to a single artist instead of 102 Line2Ds.
+        # Hairlines on exact axis-aligned positions: coverage antialiasing buys
+        # nothing visible here, so let Agg take its plain scanline path.
+        ax.add_collection(
+            LineCollection(
+                _GRID_SEGMENTS, colors=style["grid"], linewidths=0.35, antialiaseds=False, zorder=0, gid="grid"
+            )
+        )
+
+    left, top = style["left"], style["top"]
+    _label(ax, left, top, title, fontproperties=_font(20, "bold"), color=style["title_color"], va="top", ha="left")
+    if subtitle:
+        _label(
+            ax,
+            left,
+            top - 0.03,
+            subtitle,
+            fontproperties=_font(style["subtitle_size"]),
+            color=style["subtitle_color"],
+            va="top",
+            ha="left",
+        )
+    return fig, ax
+
+
+def save_figure(fig, outputs):
+    # The figure is already the exact output size (see make_canvas), so no
+    # bbox_inches: "tight" costs an extra full draw just to measure the artists.
+    image = None
+    for output_path in outputs:
+        fmt = output_path.suffix[1:]
+        if fmt in RASTER_FORMATS:
+            # Rasterise once on the Agg canvas and hand its RGBA buffer straight
+            # to Pillow for the palette PNG / WebP: no intermediate PNG encode
+            # and decode.
+            if image is None:
+                image = _rasterise(fig)
+            data = encode_image(image, fmt)
+        else:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, **SAVE_OPTIONS.get(fmt, {}))
+            data = buffer.getvalue()
+        write_atomic(output_path, data)
+
+
+def _rasterise(fig):
+    # The grid is a solid 1 px line in Agg (see make_canvas): paint it in the
+    # paler raster shade, and put the vector colour back for SVG/PDF.
+    grids = [c for c in fig.axes[0].collections if c.get_gid() == "grid"]
+    colors = [c.get_color() for c in grids]
+    for grid in grids:
+        grid.set_color(GRID_RASTER)
+    fig.canvas.draw()
+    for grid, color in zip(grids, colors):
+        grid.set_color(color)
+    return Image.fromarray(np.asarray(fig.canvas.buffer_rgba()))
+
+
+# The draw_* shape helpers only build their patches (and add their labels);
+# callers collect them and add them here in paint order.
+def add_patches(ax, patches):
+    # One collection per figure instead of one artist per box; match_original
+    # keeps each patch's own face/edge colours, line width and antialiasing.
+    ax.add_collection(PatchCollection(patches, match_original=True))
+
+
+# lines: a sequence of body lines, or the body already joined into one string.
+def draw_box(ax, x, y, w, h, title, lines, face="#ffffff", edge="#b8c7db"):
+    box = FancyBboxPatch(
+        (x, y),
+        w,
+        h,
+        boxstyle=_BOX_STYLE,
+        linewidth=1.5,
+        edgecolor=edge,
+        facecolor=face,
+    )
+
+    _label(
+        ax,
+        x + 0.012,
+        y + h - 0.03,
+        title,
+        fontproperties=_font(11, "bold"),
+        color="#0f2942",
+        va="top",
+        ha="left",
+    )
+
+    _label(
+        ax,
+        x + 0.012,
+        y + h - 0.06,
+        lines if isinstance(lines, str) else "\n".join(lines),
+        fontproperties=_font(9),
+        color="#233647",
+        va="top",
+        ha="left",
+        linespacing=1.25,
+    )
+    return box
+
+
+def draw_layer(ax, x, y, w, h, title, edge):
+    box = Rectangle((x, y), w, h, linewidth=1.4, edgecolor=edge, facecolor="none", antialiased=False)
+    _label(ax, x + w / 2, y + h - 0.015, title, fontproperties=_font(11), color=TEXT, ha="center", va="top")
+    return box
+
+
+def draw_rect(ax, x, y, w, h, text, fontsize=9.5, fill="#f8f8f8", edge=BOX_EDGE):
+    box = Rectangle((x, y), w, h, linewidth=1.2, edgecolor=edge, facecolor=fill, antialiased=False)
+    _label(ax, x + w / 2, y + h / 2, text, fontproperties=_font(fontsize), color=TEXT, ha="center", va="center")
+    return box
+
+
+def draw_round(ax, x, y, w, h, text, fontsize=10, fill="#f8f8f8", edge=BOX_EDGE):
+    box = FancyBboxPatch(
+        (x, y),
+        w,
+        h,
+        boxstyle=_PANEL_STYLE,
+        linewidth=1.3,
+        edgecolor=edge,
+        facecolor=fill,
+    )
+    _label(ax, x + w / 2, y + h / 2, text, fontproperties=_font(fontsize), color=TEXT, ha="center", va="center")
+    return box
+
+
+def draw_bullet_panel(ax, x, y, w, h, title, lines, fontsize=8):
+    box = FancyBboxPatch(
+        (x, y),
+        w,
+        h,
+        boxstyle=_PANEL_STYLE,
+        linewidth=1.2,
+        edgecolor=BOX_EDGE,
+        facecolor="#f9f9f9",
+    )
+    _label(ax, x + 0.015, y + h - 0.02, title, fontproperties=_font(8.6, "bold"), color=TEXT, ha="left", va="top")
+
+    # One multi-line text (a single layout pass) rather than one per bullet;
+    # linespacing 1.55 keeps the previous 0.028 axes-unit bullet pitch.
+    _label(
+        ax,
+        x + 0.018,
+        y + h - 0.05,
+        "\n".join(f"- {item}" for item in lines[:4]),
+        fontproperties=_font(fontsize),
+        color="#333333",
+        ha="left",
+        va="top",
+        linespacing=1.55,
+    )
+    return box
+
+
+def draw_ellipse(ax, x, y, w, h, text, fontsize=10):
+    shape = Ellipse((x + w / 2, y + h / 2), w, h, linewidth=1.2, edgecolor=BOX_EDGE, facecolor="#f8f8f8")
+    _label(ax, x + w / 2, y + h / 2, text, fontproperties=_font(fontsize), color=TEXT, ha="center", va="center")
+    return shape
+
+
+# Quarter-ellipse Bezier handle length (4/3 * (sqrt(2) - 1)).
+_KAPPA = 0.5523
+
+
+def _rim(y, b, leftward=False):
+    # Half of a full-width ellipse centred on height y, bulging by b (down if
+    # negative): two cubic Beziers from x=0 to x=1, or back if leftward.
+    points = [(0, y + _KAPPA * b), (0.5 - _KAPPA / 2, y + b), (0.5, y + b)]
+    points += [(0.5 + _KAPPA / 2, y + b), (1, y + _KAPPA * b), (1, y)]
+    return [(1 - px, py) for px, py in points] if leftward else points
+
+
+@functools.lru_cache(maxsize=None)
+def _database_glyph(h):
+    # Cylinder in a unit box, scaled to w x h when drawn. The caps are 0.05
+    # data units tall whatever the glyph height, hence one path per height.
+    bottom, top, b = 0.025 / h, 1 - 0.005 / h, 0.025 / h
+    curve = [Path.CURVE4] * 6
+    # Closed outline (sides, lower rim, top of the lid), then the front of the
+    # lid and the back of the bottom rim as open strokes inside it. All three
+    # run counter-clockwise so the nonzero fill never cancels out.
+    vertices = [(0, top), (0, bottom), *_rim(bottom, -b), (1, top), *_rim(top, b, leftward=True), (0, top)]
+    codes = [Path.MOVETO, Path.LINETO, *curve, Path.LINETO, *curve, Path.CLOSEPOLY]
+    vertices += [(0, top), *_rim(top, -b), (1, bottom), *_rim(bottom, b, leftward=True)]
+    codes += [Path.MOVETO, *curve, Path.MOVETO, *curve]
+    return Path(vertices, codes, readonly=True)
+
+
+def draw_database(ax, x, y, w, h, title, subtitle=""):
+    glyph = PathPatch(
+        Affine2D().scale(w, h).translate(x, y).transform_path(_database_glyph(h)),
+        linewidth=1.2,
+        edgecolor=BOX_EDGE,
+        facecolor="#f8f8f8",
+    )
+    _label(ax, x + w / 2, y + h / 2 + 0.02, title, fontproperties=_font(9.5), color=TEXT, ha="center", va="center")
+    if subtitle:
+        _label(
+            ax,
+            x + w / 2,
+            y + h / 2 - 0.02,
+            subtitle,
+            fontproperties=_font(8.3),
+            color="#444444",
+            ha="center",
+            va="center",
+        )
+    return glyph
+
+
+# Sample points along a curved (arc3) arrow's quadratic Bezier.
+_CURVE_T = np.linspace(0, 1, 16)[:, None]
+
+
+def draw_arrows(ax, arrows, color="#424242", mutation_scale=12, linewidth=1.2):
+    # arrows: (start, end, curve), curve being the arc3 rad. All shafts go into
+    # one LineCollection and all heads into one PolyCollection. The geometry is
+    # worked out in points over the axes' physical size, where a "-|>" head is
+    # a true triangle whatever the data aspect, then mapped back to data units.
+    scale = np.array([ax.bbox.width, ax.bbox.height]) / ax.figure.dpi * 72
+    head_length, head_half_width = arrow_head(mutation_scale, linewidth)
+
+    shafts, heads = [], []
+    for start, end, curve in arrows:
+        p0, p1 = np.asarray(start) * scale, np.asarray(end) * scale
+        if curve:
+            control = np.array(arc3_control(*p0, *p1, curve))
+            shaft = (1 - _CURVE_T) ** 2 * p0 + 2 * (1 - _CURVE_T) * _CURVE_T * control + _CURVE_T**2 * p1
+            direction = p1 - control
+        else:
+            shaft = np.array([p0, p1])
+            direction = p1 - p0
+        direction /= np.hypot(*direction)
+        base = p1 - direction * head_length
+        normal = np.array([-direction[1], direction[0]]) * head_half_width
+        # End the shaft at the head's base so its cap never pokes past the tip.
+        shaft[-1] = base
+        shafts.append(shaft / scale)
+        heads.append(np.array([p1, base + normal, base - normal]) / scale)
+
+    ax.add_collection(LineCollection(shafts, colors=color, linewidths=linewidth))
+    ax.add_collection(PolyCollection(heads, facecolors=color, edgecolors="none"))
+
+
+def label_arrow(ax, start, end, label):
+    mx = (start[0] + end[0]) / 2
+    my = (start[1] + end[1]) / 2
+    _label(ax, mx, my + 0.012, label, fontproperties=_font(8), color="#383838", ha="center", va="bottom")
@@ -0,0 +1,138 @@
+import math
+
+from PIL import Image, ImageDraw, ImageFont
+
+from _diagram_geometry import arc3_control, arrow_head
+from _diagram_image import encode_image, write_atomic
+from _diagram_settings import PAD_INCHES
+
+
+# Pure-Pillow renderer for diagrams made only of rounded boxes, text and
+# arrows (the architecture overview). It skips the matplotlib import and Agg
+# entirely and draws straight into an RGB image, laid out like make_canvas():
+# the 0..1 drawing area inset by PAD_INCHES from the figure edge.
+
+_FONT_FILES = {"normal": "DejaVuSans.ttf", "bold": "DejaVuSans-Bold.ttf"}
+
+# Same rounded box as draw_box().
+_BOX_PAD = 0.012
+_BOX_ROUNDING = 0.015
+_CURVE_SAMPLES = 16
+
+
+class _Canvas:
+    def __init__(self, figsize, dpi, background):
+        self.dpi = dpi
+        self.pad = PAD_INCHES * dpi
+        self.width = figsize[0] * dpi - 2 * self.pad
+        self.height = figsize[1] * dpi - 2 * self.pad
+        size = (round(figsize[0] * dpi), round(figsize[1] * dpi))
+        self.image = Image.new("RGB", size, background)
+        self.draw = ImageDraw.Draw(self.image)
+        self._fonts = {}
+
+    def xy(self, x, y):
+        return self.pad + x * self.width, self.pad + (1 - y) * self.height
+
+    def px(self, points):
+        return points * self.dpi / 72
+
+    def font(self, size, weight="normal"):
+        key = (size, weight)
+        if key not in self._fonts:
+            try:
+                self._fonts[key] = ImageFont.truetype(_FONT_FILES[weight], self.px(size))
+            except OSError as exc:
+                # Pillow's built-in fallback font would give a visibly different
+                # diagram, so refuse rather than degrade silently.
+                raise OSError(
+                    f"{_FONT_FILES[weight]} not found: install the DejaVu fonts or use --renderer matplotlib"
+                ) from exc
+        return self._fonts[key]
+
+    def text(self, x, y, text, size, color, weight="normal", linespacing=1.2):
+        font = self.font(size, weight)
+        left, top = self.xy(x, y)
+        for line in text.split("\n"):
+            self.draw.text((left, top), line, font=font, fill=color, anchor="la")
+            top += linespacing * self.px(size)
+
+    def save(self, output_path):
+        write_atomic(output_path, encode_image(self.image, "png"))
+
+
+def _draw_box_shape(canvas, x, y, w, h, face, edge):
+    left, top = canvas.xy(x - _BOX_PAD, y + h + _BOX_PAD)
+    right, bottom = canvas.xy(x + w + _BOX_PAD, y - _BOX_PAD)
+    canvas.draw.rounded_rectangle(
+        (left, top, right, bottom),
+        radius=_BOX_ROUNDING * canvas.height,
+        fill=face,
+        outline=edge,
+        width=round(canvas.px(1.5)),
+    )
+
+
+def _draw_box_text(canvas, x, y, w, h, title, lines):
+    canvas.text(x + 0.012, y + h - 0.03, title, 11, "#0f2942", weight="bold")
+    body = lines if isinstance(lines, str) else "\n".join(lines)
+    canvas.text(x + 0.012, y + h - 0.06, body, 9, "#233647", linespacing=1.25)
+
+
+def _draw_arrow(canvas, start, end, curve, color, mutation_scale, linewidth):
+    x0, y0 = canvas.xy(*start)
+    x1, y1 = canvas.xy(*end)
+    if curve:
+        # The shared geometry is y-up; canvas pixels are y-down.
+        cx, cy = arc3_control(x0, -y0, x1, -y1, curve)
+        cy = -cy
+        points = []
+        for i in range(_CURVE_SAMPLES + 1):
+            t = i / _CURVE_SAMPLES
+            points.append(
+                (
+                    (1 - t) ** 2 * x0 + 2 * (1 - t) * t * cx + t**2 * x1,
+                    (1 - t) ** 2 * y0 + 2 * (1 - t) * t * cy + t**2 * y1,
+                )
+            )
+        tangent = (x1 - cx, y1 - cy)
+    else:
+        points = [(x0, y0), (x1, y1)]
+        tangent = (x1 - x0, y1 - y0)
+
+    norm = math.hypot(*tangent) or 1.0
+    ux, uy = tangent[0] / norm, tangent[1] / norm
+    length, half_width = (canvas.px(value) for value in arrow_head(mutation_scale, linewidth))
+    base_x, base_y = x1 - ux * length, y1 - uy * length
+    # End the shaft at the head's base, as draw_arrows() does.
+    points[-1] = (base_x, base_y)
+    canvas.draw.line(points, fill=color, width=round(canvas.px(linewidth)), joint="curve")
+    canvas.draw.polygon(
+        [
+            (x1, y1),
+            (base_x - uy * half_width, base_y + ux * half_width),
+            (base_x + uy * half_width, base_y - ux * half_width),
+        ],
+        fill=color,
+    )
+
+
+def render_box_diagram(output_path, title, subtitle, boxes, arrows, figsize, dpi, style, arrow_style):
+    # boxes: (x, y, w, h, title, lines, face, edge) as for draw_box();
+    # arrows: (start, end, curve) as for draw_arrows().
+    canvas = _Canvas(figsize, dpi, style["background"])
+
+    # Shapes, then arrows, then text: the same stacking matplotlib's zorder gives.
+    for x, y, w, h, _, _, face, edge in boxes:
+        _draw_box_shape(canvas, x, y, w, h, face, edge)
+    for start, end, curve in arrows:
+        _draw_arrow(canvas, start, end, curve, **arrow_style)
+
+    left, top = style["left"], style["top"]
+    canvas.text(left, top, title, 20, style["title_color"], weight="bold")
+    if subtitle:
+        canvas.text(left, top - 0.03, subtitle, style["subtitle_size"], style["subtitle_color"])
+    for x, y, w, h, box_title, lines, _, _ in boxes:
+        _draw_box_text(canvas, x, y, w, h, box_title, lines)
+
+    canvas.save(output_path)
@@ -0,0 +1,33 @@
+import argparse
+
+import generate_clio_architecture_png
+import generate_clio_proposal_diagrams
+
+
+# Both generators share one interpreter (and one matplotlib import) when run
+# from here, which is how CI regenerates every diagram in docs/architecture.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate the CLIO architecture diagrams.")
+    parser.add_argument(
+        "--which",
+        choices=["all", "architecture", "proposal"],
+        default="all",
+        help="diagram set to generate (default: all)",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=["matplotlib", "pil"],
+        default="matplotlib",
+        help="renderer for the architecture overview PNG; pil is faster, other formats always use matplotlib "
+        "(default: matplotlib)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.which in ("all", "architecture"):
+        generate_clio_architecture_png.main(renderer=args.renderer)
+    if args.which in ("all", "proposal"):
+        generate_clio_proposal_diagrams.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,391 +1,425 @@
+import multiprocessing
+import os
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-from matplotlib.patches import Ellipse, FancyArrowPatch, FancyBboxPatch, Rectangle
+from _diagram_cache import is_current, output_paths, record_digest, spec_digest
+from _diagram_settings import DIAGRAM_DPI, DIAGRAM_FORMATS, PALETTE_COLORS
 
 
-BG = "#f3f3f3"
-GRID = "#e1e1e1"
-BOX_EDGE = "#3b3b3b"
-TEXT = "#1f1f1f"
 ACCENT_BLUE = "#3269b1"
 ACCENT_GREEN = "#3f8f5a"
 ACCENT_PURPLE = "#6a4fc9"
 
-
-def setup_canvas(title, subtitle="", figsize=(16, 9)):
-    fig, ax = plt.subplots(figsize=figsize, dpi=170)
-    fig.patch.set_facecolor(BG)
-    ax.set_facecolor(BG)
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    ax.axis("off")
-
-    # Subtle square grid similar to architecture tools.
-    steps = 50
-    for i in range(steps + 1):
-        p = i / steps
-        ax.plot([p, p], [0, 1], color=GRID, linewidth=0.35, zorder=0)
-        ax.plot([0, 1], [p, p], color=GRID, linewidth=0.35, zorder=0)
-
-    ax.text(0.02, 0.975, title, fontsize=20, weight="bold", color=TEXT, va="top", ha="left")
-    if subtitle:
-        ax.text(0.02, 0.945, subtitle, fontsize=10, color="#3f3f3f", va="top", ha="left")
-    return fig, ax
-
-
-def draw_layer(ax, x, y, w, h, title, edge):
-    box = Rectangle((x, y), w, h, linewidth=1.4, edgecolor=edge, facecolor="none")
-    ax.add_patch(box)
-    ax.text(x + w / 2, y + h - 0.015, title, fontsize=11, color=TEXT, ha="center", va="top")
-
-
-def draw_rect(ax, x, y, w, h, text, fontsize=9.5, fill="#f8f8f8", edge=BOX_EDGE):
-    box = Rectangle((x, y), w, h, linewidth=1.2, edgecolor=edge, facecolor=fill)
-    ax.add_patch(box)
-    ax.text(x + w / 2, y + h / 2, text, fontsize=fontsize, color=TEXT, ha="center", va="center")
-
-
-def draw_round(ax, x, y, w, h, text, fontsize=10, fill="#f8f8f8", edge=BOX_EDGE):
-    box = FancyBboxPatch(
-        (x, y),
-        w,
-        h,
-        boxstyle="round,pad=0.01,rounding_size=0.02",
-        linewidth=1.3,
-        edgecolor=edge,
-        facecolor=fill,
-    )
-    ax.add_patch(box)
-    ax.text(x + w / 2, y + h / 2, text, fontsize=fontsize, color=TEXT, ha="center", va="center")
-
-
-def draw_bullet_panel(ax, x, y, w, h, title, lines, fontsize=8):
-    box = FancyBboxPatch(
-        (x, y),
-        w,
-        h,
-        boxstyle="round,pad=0.01,rounding_size=0.02",
-        linewidth=1.2,
-        edgecolor=BOX_EDGE,
-        facecolor="#f9f9f9",
-    )
-    ax.add_patch(box)
-    ax.text(x + 0.015, y + h - 0.02, title, fontsize=8.6, weight="bold", color=TEXT, ha="left", va="top")
-
-    line_y = y + h - 0.05
-    for item in lines[:4]:
-        ax.text(x + 0.018, line_y, f"- {item}", fontsize=fontsize, color="#333333", ha="left", va="top")
-        line_y -= 0.028
-
-
-def draw_ellipse(ax, x, y, w, h, text, fontsize=10):
-    shape = Ellipse((x + w / 2, y + h / 2), w, h, linewidth=1.2, edgecolor=BOX_EDGE, facecolor="#f8f8f8")
-    ax.add_patch(shape)
-    ax.text(x + w / 2, y + h / 2, text, fontsize=fontsize, color=TEXT, ha="center", va="center")
-
-
-def draw_database(ax, x, y, w, h, title, subtitle=""):
-    body_h = h - 0.05
-    body = Rectangle((x, y + 0.025), w, body_h, linewidth=1.2, edgecolor=BOX_EDGE, facecolor="#f8f8f8")
-    ax.add_patch(body)
-    top = Ellipse((x + w / 2, y + h - 0.005), w, 0.05, linewidth=1.2, edgecolor=BOX_EDGE, facecolor="#f8f8f8")
-    bottom = Ellipse((x + w / 2, y + 0.025), w, 0.05, linewidth=1.2, edgecolor=BOX_EDGE, facecolor="#f8f8f8")
-    ax.add_patch(top)
-    ax.add_patch(bottom)
-    ax.text(x + w / 2, y + h / 2 + 0.02, title, fontsize=9.5, color=TEXT, ha="center", va="center")
-    if subtitle:
-        ax.text(x + w / 2, y + h / 2 - 0.02, subtitle, fontsize=8.3, color="#444444", ha="center", va="center")
-
-
-def arrow(ax, start, end, label="", curve=0.0):
-    patch = FancyArrowPatch(
-        start,
-        end,
-        arrowstyle="-|>",
-        mutation_scale=12,
-        linewidth=1.2,
-        color="#424242",
-        connectionstyle=f"arc3,rad={curve}",
-    )
-    ax.add_patch(patch)
-    if label:
-        mx = (start[0] + end[0]) / 2
-        my = (start[1] + end[1]) / 2
-        ax.text(mx, my + 0.012, label, fontsize=8, color="#383838", ha="center", va="bottom")
-
-
-def generate_layered_architecture(output_path):
-    fig, ax = setup_canvas(
-        "Project CLIO - System Architecture",
-        "Current implementation view: Security, Client, Identity, API/Services, Data, Audit + Incident Response",
-        figsize=(18, 10),
-    )
-
-    draw_layer(ax, 0.02, 0.80, 0.42, 0.18, "Security Layer", ACCENT_GREEN)
-    draw_layer(ax, 0.46, 0.78, 0.22, 0.20, "Client Layer", ACCENT_BLUE)
-    draw_layer(ax, 0.70, 0.78, 0.28, 0.20, "Identity Layer", ACCENT_PURPLE)
-    draw_layer(ax, 0.03, 0.47, 0.44, 0.28, "API + Domain Layer", ACCENT_GREEN)
-    draw_layer(ax, 0.49, 0.43, 0.24, 0.32, "Data Layer", ACCENT_BLUE)
-    draw_layer(ax, 0.75, 0.43, 0.23, 0.32, "Audit + Incident Layer", ACCENT_PURPLE)
-
+LAYERED_TITLE = "Project CLIO - System Architecture"
+LAYERED_SUBTITLE = (
+    "Current implementation view: Security, Client, Identity, API/Services, Data, Audit + Incident Response"
+)
+
+# (x, y, w, h, title, edge)
+LAYERS = (
+    (0.02, 0.80, 0.42, 0.18, "Security Layer", ACCENT_GREEN),
+    (0.46, 0.78, 0.22, 0.20, "Client Layer", ACCENT_BLUE),
+    (0.70, 0.78, 0.28, 0.20, "Identity Layer", ACCENT_PURPLE),
+    (0.03, 0.47, 0.44, 0.28, "API + Domain Layer", ACCENT_GREEN),
+    (0.49, 0.43, 0.24, 0.32, "Data Layer", ACCENT_BLUE),
+    (0.75, 0.43, 0.23, 0.32, "Audit + Incident Layer", ACCENT_PURPLE),
+)
+
+# (x, y, w, h, text)
+COMPONENTS = (
     # Security controls
-    draw_rect(ax, 0.05, 0.89, 0.11, 0.055, "RBAC")
-    draw_rect(ax, 0.18, 0.89, 0.13, 0.055, "Ownership / IDOR Check")
-    draw_rect(ax, 0.33, 0.89, 0.09, 0.055, "Rate Limit")
-    draw_rect(ax, 0.05, 0.82, 0.17, 0.055, "CSP + HSTS + Security Headers")
-    draw_rect(ax, 0.24, 0.82, 0.18, 0.055, "Session Validation + Role Sync")
-
+    (0.05, 0.89, 0.11, 0.055, "RBAC"),
+    (0.18, 0.89, 0.13, 0.055, "Ownership / IDOR Check"),
+    (0.33, 0.89, 0.09, 0.055, "Rate Limit"),
+    (0.05, 0.82, 0.17, 0.055, "CSP + HSTS + Security Headers"),
+    (0.24, 0.82, 0.18, 0.055, "Session Validation + Role Sync"),
     # Client layer
-    draw_rect(ax, 0.50, 0.90, 0.14, 0.055, "Web Browser")
-    draw_rect(ax, 0.50, 0.83, 0.14, 0.055, "Next.js UI (App Router)")
-    draw_rect(ax, 0.50, 0.76, 0.14, 0.055, "Role-Based Sidebar")
-
+    (0.50, 0.90, 0.14, 0.055, "Web Browser"),
+    (0.50, 0.83, 0.14, 0.055, "Next.js UI (App Router)"),
+    (0.50, 0.76, 0.14, 0.055, "Role-Based Sidebar"),
     # Identity layer
-    draw_rect(ax, 0.75, 0.90, 0.19, 0.055, "Firebase Auth (Google)")
-    draw_rect(ax, 0.75, 0.83, 0.19, 0.055, "Invite Verify + Session Issue")
-    draw_rect(ax, 0.75, 0.76, 0.19, 0.055, "Optional MFA Policy")
-
+    (0.75, 0.90, 0.19, 0.055, "Firebase Auth (Google)"),
+    (0.75, 0.83, 0.19, 0.055, "Invite Verify + Session Issue"),
+    (0.75, 0.76, 0.19, 0.055, "Optional MFA Policy"),
     # API + domain
-    draw_rect(ax, 0.06, 0.67, 0.18, 0.06, "API Routes (/api/hris/*)")
-    draw_rect(ax, 0.26, 0.67, 0.18, 0.06, "Auth/Invite/User APIs")
-    draw_rect(ax, 0.06, 0.59, 0.18, 0.06, "Employee/Lifecycle APIs")
-    draw_rect(ax, 0.26, 0.59, 0.18, 0.06, "Attendance/Performance APIs")
-    draw_rect(ax, 0.06, 0.51, 0.18, 0.06, "Exports/Retention APIs")
-    draw_rect(ax, 0.26, 0.51, 0.18, 0.06, "Incident/Notification APIs")
-
+    (0.06, 0.67, 0.18, 0.06, "API Routes (/api/hris/*)"),
+    (0.26, 0.67, 0.18, 0.06, "Auth/Invite/User APIs"),
+    (0.06, 0.59, 0.18, 0.06, "Employee/Lifecycle APIs"),
+    (0.26, 0.59, 0.18, 0.06, "Attendance/Performance APIs"),
+    (0.06, 0.51, 0.18, 0.06, "Exports/Retention APIs"),
+    (0.26, 0.51, 0.18, 0.06, "Incident/Notification APIs"),
     # Data layer
-    draw_database(ax, 0.53, 0.60, 0.16, 0.11, "Firestore", "databaseId: cliohris")
-    draw_rect(ax, 0.51, 0.51, 0.20, 0.06, "Collections: users, employees,")
-    draw_rect(ax, 0.51, 0.445, 0.20, 0.06, "attendance, lifecycle, performance,")
-    draw_rect(ax, 0.51, 0.38, 0.20, 0.06, "exports, incidents, notifications, audit")
-    draw_database(ax, 0.53, 0.28, 0.16, 0.11, "Firebase Storage", "gs://atracaas-platform-clio")
-
+    (0.51, 0.51, 0.20, 0.06, "Collections: users, employees,"),
+    (0.51, 0.445, 0.20, 0.06, "attendance, lifecycle, performance,"),
+    (0.51, 0.38, 0.20, 0.06, "exports, incidents, notifications, audit"),
     # Audit + incident
-    draw_rect(ax, 0.78, 0.66, 0.17, 0.06, "Audit Log Writer")
-    draw_rect(ax, 0.78, 0.58, 0.17, 0.06, "Forensic Log Views")
-    draw_rect(ax, 0.78, 0.50, 0.17, 0.06, "IDS Detection Rules")
-    draw_rect(ax, 0.78, 0.42, 0.17, 0.06, "Retry Queue + Dead Letter")
-    draw_rect(ax, 0.78, 0.34, 0.17, 0.06, "Incident Mgmt + Alerts")
-
-    # Arrows
-    arrow(ax, (0.42, 0.92), (0.50, 0.92))
-    arrow(ax, (0.64, 0.92), (0.75, 0.92))
-    arrow(ax, (0.57, 0.83), (0.35, 0.70), curve=-0.05)
-    arrow(ax, (0.75, 0.86), (0.44, 0.70), curve=0.05)
-    arrow(ax, (0.24, 0.67), (0.53, 0.66))
-    arrow(ax, (0.44, 0.59), (0.53, 0.59))
-    arrow(ax, (0.44, 0.51), (0.53, 0.51))
-    arrow(ax, (0.69, 0.64), (0.78, 0.69))
-    arrow(ax, (0.69, 0.56), (0.78, 0.61))
-    arrow(ax, (0.69, 0.48), (0.78, 0.53))
-    arrow(ax, (0.86, 0.50), (0.86, 0.48))
-    arrow(ax, (0.86, 0.42), (0.86, 0.40))
-    arrow(ax, (0.78, 0.37), (0.69, 0.34), curve=-0.08)
-    arrow(ax, (0.53, 0.33), (0.44, 0.55), curve=0.08)
-    arrow(ax, (0.29, 0.89), (0.16, 0.72), curve=-0.08)
-
-    fig.savefig(output_path, bbox_inches="tight")
-    plt.close(fig)
-
-
-def generate_role_dfd(output_path, role_title, actor_lines, process_label, action_lines, db_label, audit_lines, notes):
-    fig, ax = setup_canvas(f"{role_title} Data Flow Diagram", "Project CLIO Role-Centric Operational Flow", figsize=(16, 8))
-
-    # External actors
-    y = 0.72
-    for line in actor_lines:
-        draw_rect(ax, 0.04, y, 0.14, 0.08, line, fontsize=8.6)
-        y -= 0.11
-
-    # Role gateway and core process
-    draw_rect(ax, 0.23, 0.56, 0.14, 0.08, role_title)
-    draw_ellipse(ax, 0.45, 0.49, 0.18, 0.16, process_label, fontsize=9.6)
-    draw_rect(ax, 0.41, 0.70, 0.22, 0.06, "RBAC + Ownership Validation", fontsize=8.7)
-
-    # Action stack
-    action_y = 0.73
-    for item in action_lines:
-        draw_rect(ax, 0.68, action_y, 0.16, 0.065, item, fontsize=8.3)
-        action_y -= 0.09
-
-    # Data stores
-    draw_database(ax, 0.88, 0.48, 0.09, 0.22, "CLIO DB", db_label)
-    draw_database(ax, 0.88, 0.18, 0.09, 0.20, "Audit Logs", "Tamper-resistant")
-
-    # Notes and audit panels (split to avoid text overlap)
-    draw_bullet_panel(ax, 0.25, 0.16, 0.29, 0.16, "Audit Focus", audit_lines, fontsize=8)
-    draw_bullet_panel(ax, 0.56, 0.16, 0.22, 0.16, "Security Notes", notes, fontsize=8)
-
-    # Arrows
-    first_actor_center = (0.18, 0.76)
-    arrow(ax, first_actor_center, (0.23, 0.60), "Access")
-    if len(actor_lines) > 1:
-        arrow(ax, (0.18, 0.65), (0.23, 0.60), curve=0.05)
-    if len(actor_lines) > 2:
-        arrow(ax, (0.18, 0.54), (0.23, 0.60), curve=0.09)
-
-    arrow(ax, (0.37, 0.60), (0.45, 0.57), "Authorized request")
-    arrow(ax, (0.52, 0.70), (0.52, 0.65), "Policy checks")
-
-    action_centers = [0.762, 0.672, 0.582, 0.492, 0.402]
-    for cy in action_centers[: len(action_lines)]:
-        arrow(ax, (0.63, 0.57), (0.68, cy), curve=0.02)
-
-    arrow(ax, (0.84, 0.63), (0.88, 0.60), "Read/Write")
-    arrow(ax, (0.84, 0.36), (0.88, 0.28), "Audit event")
-    arrow(ax, (0.88, 0.56), (0.63, 0.53), "Data response", curve=-0.1)
-    arrow(ax, (0.93, 0.48), (0.93, 0.38))
-    arrow(ax, (0.63, 0.49), (0.46, 0.32), curve=-0.12)
-
-    fig.savefig(output_path, bbox_inches="tight")
-    plt.close(fig)
-
-
-def main():
-    out = Path("docs/architecture")
-    out.mkdir(parents=True, exist_ok=True)
-
-    generate_layered_architecture(out / "clio-system-architecture-proposal.png")
-
-    generate_role_dfd(
-        out / "clio-dfd-super-admin.png",
+    (0.78, 0.66, 0.17, 0.06, "Audit Log Writer"),
+    (0.78, 0.58, 0.17, 0.06, "Forensic Log Views"),
+    (0.78, 0.50, 0.17, 0.06, "IDS Detection Rules"),
+    (0.78, 0.42, 0.17, 0.06, "Retry Queue + Dead Letter"),
+    (0.78, 0.34, 0.17, 0.06, "Incident Mgmt + Alerts"),
+)
+
+# (x, y, w, h, title, subtitle)
+DATABASES = (
+    (0.53, 0.60, 0.16, 0.11, "Firestore", "databaseId: cliohris"),
+    (0.53, 0.28, 0.16, 0.11, "Firebase Storage", "gs://atracaas-platform-clio"),
+)
+
+# (start, end, curve)
+LAYERED_ARROWS = (
+    ((0.42, 0.92), (0.50, 0.92), 0.0),
+    ((0.64, 0.92), (0.75, 0.92), 0.0),
+    ((0.57, 0.83), (0.35, 0.70), -0.05),
+    ((0.75, 0.86), (0.44, 0.70), 0.05),
+    ((0.24, 0.67), (0.53, 0.66), 0.0),
+    ((0.44, 0.59), (0.53, 0.59), 0.0),
+    ((0.44, 0.51), (0.53, 0.51), 0.0),
+    ((0.69, 0.64), (0.78, 0.69), 0.0),
+    ((0.69, 0.56), (0.78, 0.61), 0.0),
+    ((0.69, 0.48), (0.78, 0.53), 0.0),
+    ((0.86, 0.50), (0.86, 0.48), 0.0),
+    ((0.86, 0.42), (0.86, 0.40), 0.0),
+    ((0.78, 0.37), (0.69, 0.34), -0.08),
+    ((0.53, 0.33), (0.44, 0.55), 0.08),
+    ((0.29, 0.89), (0.16, 0.72), -0.08),
+)
+
+
+# Role DFD layout, shared by every role diagram (only the ROLE_DFDS labels
+# differ). Boxes are (x, y, w, h) and arrows (start, end, label, curve). Actor
+# and action boxes stack down from their start y, one per line; only the first
+# three actors and five actions get an arrow.
+DFD_GEOMETRY = {
+    "actor_box": (0.04, 0.72, 0.14, 0.08),
+    "actor_step": 0.11,
+    "actor_arrows": (
+        ((0.18, 0.76), (0.23, 0.60), "Access", 0.0),
+        ((0.18, 0.65), (0.23, 0.60), "", 0.05),
+        ((0.18, 0.54), (0.23, 0.60), "", 0.09),
+    ),
+    "role_box": (0.23, 0.56, 0.14, 0.08),
+    "process": (0.45, 0.49, 0.18, 0.16),
+    "policy_box": (0.41, 0.70, 0.22, 0.06),
+    "core_arrows": (
+        ((0.37, 0.60), (0.45, 0.57), "Authorized request", 0.0),
+        ((0.52, 0.70), (0.52, 0.65), "Policy checks", 0.0),
+    ),
+    "action_box": (0.68, 0.73, 0.16, 0.065),
+    "action_step": 0.09,
+    "action_arrows": tuple(((0.63, 0.57), (0.68, cy), "", 0.02) for cy in (0.762, 0.672, 0.582, 0.492, 0.402)),
+    "databases": ((0.88, 0.48, 0.09, 0.22), (0.88, 0.18, 0.09, 0.20)),
+    "panels": ((0.25, 0.16, 0.29, 0.16), (0.56, 0.16, 0.22, 0.16)),
+    "store_arrows": (
+        ((0.84, 0.63), (0.88, 0.60), "Read/Write", 0.0),
+        ((0.84, 0.36), (0.88, 0.28), "Audit event", 0.0),
+        ((0.88, 0.56), (0.63, 0.53), "Data response", -0.1),
+        ((0.93, 0.48), (0.93, 0.38), "", 0.0),
+        ((0.63, 0.49), (0.46, 0.32), "", -0.12),
+    ),
+}
+
+
+# Role DFD specs by output file name: the keyword arguments of
+# generate_role_dfd() apart from output_path.
+ROLE_DFDS = {
+    "clio-dfd-super-admin.png": dict(
         role_title="Super Admin",
-        actor_lines=["Super Admin", "Security Lead"],
+        actor_lines=("Super Admin", "Security Lead"),
         process_label="Account Governance Console",
-        action_lines=[
+        action_lines=(
             "Create Invite / Account",
             "Assign Account Role",
             "Disable / Enable Account",
             "Revoke Sessions",
             "Audit Admin Actions",
-        ],
+        ),
         db_label="users + invites",
-        audit_lines=[
+        audit_lines=(
             "Actor identity",
             "Before/after role state",
             "Invite + status transition",
             "Source IP and device",
-        ],
-        notes=[
+        ),
+        notes=(
             "No shared accounts",
             "Least privilege enforcement",
             "Session version invalidation",
             "Admin actions fully auditable",
-        ],
-    )
-
-    generate_role_dfd(
-        out / "clio-dfd-grc.png",
+        ),
+    ),
+    "clio-dfd-grc.png": dict(
         role_title="GRC",
-        actor_lines=["GRC Officer", "Compliance Auditor", "Executive Committee"],
+        actor_lines=("GRC Officer", "Compliance Auditor", "Executive Committee"),
         process_label="Governance, Risk, Compliance Ops",
-        action_lines=[
+        action_lines=(
             "Full Records Oversight",
             "Audit + Forensic Review",
             "Access Management Review",
             "Retention & Archive Control",
             "Incident Response Handling",
-        ],
+        ),
         db_label="all HRIS modules",
-        audit_lines=[
+        audit_lines=(
             "PII access event",
             "Export volume and format",
             "Incident timeline",
             "Reviewer identity",
-        ],
-        notes=[
+        ),
+        notes=(
             "Full read/edit authority per matrix",
             "Audit visibility across modules",
             "Breach escalation ownership",
             "Retention + deletion oversight",
-        ],
-    )
-
-    generate_role_dfd(
-        out / "clio-dfd-hr.png",
+        ),
+    ),
+    "clio-dfd-hr.png": dict(
         role_title="HR",
-        actor_lines=["HR Manager", "HR Officer"],
+        actor_lines=("HR Manager", "HR Officer"),
         process_label="HR Operations Workflow",
-        action_lines=[
+        action_lines=(
             "Maintain Employee Records",
             "Run Lifecycle Workflows",
             "Manage Attendance Records",
             "Update Performance Data",
             "Manage HR Documents",
-        ],
+        ),
         db_label="employee modules",
-        audit_lines=[
+        audit_lines=(
             "Create/update traceability",
             "Attendance modifications",
             "Document version history",
             "Performed by + timestamp",
-        ],
-        notes=[
+        ),
+        notes=(
             "Restricted PII handling controls",
             "Operational HR authority",
             "Immediate offboarding revocation",
             "Changes logged for audit defense",
-        ],
-    )
-
-    generate_role_dfd(
-        out / "clio-dfd-ea.png",
+        ),
+    ),
+    "clio-dfd-ea.png": dict(
         role_title="Executive Assistant",
-        actor_lines=["Executive Office", "EA Operator"],
+        actor_lines=("Executive Office", "EA Operator"),
         process_label="Executive Support Workflow",
-        action_lines=[
+        action_lines=(
             "View Employee Records",
             "Authorized Record Updates",
             "Employment Lifecycle Support",
             "Reports & Export Requests",
             "Document Coordination",
-        ],
+        ),
         db_label="records + docs",
-        audit_lines=[
+        audit_lines=(
             "Authorization context",
             "Export justification",
             "Document access logs",
             "Action initiator",
-        ],
-        notes=[
+        ),
+        notes=(
             "Edit rights only as authorized",
             "Full logging on exports/prints",
             "Document controls and versioning",
             "RBAC checks on every API request",
-        ],
-    )
-
-    generate_role_dfd(
-        out / "clio-dfd-employee.png",
+        ),
+    ),
+    "clio-dfd-employee.png": dict(
         role_title="Employee (L1/L2/L3)",
-        actor_lines=["Employee User", "HR/GRC Reviewer"],
+        actor_lines=("Employee User", "HR/GRC Reviewer"),
         process_label="Self-Service Employee Workspace",
-        action_lines=[
+        action_lines=(
             "View Own Profile Record",
             "Edit Personal Contact Info",
             "Clock In / Clock Out",
             "View Own Attendance + Performance",
             "Access Own Attached Documents",
-        ],
+        ),
         db_label="own-scope data",
-        audit_lines=[
+        audit_lines=(
             "Ownership validation result",
             "Requested data scope",
             "Personal data change log",
             "Attendance action details",
-        ],
-        notes=[
+        ),
+        notes=(
             "IDOR prevention via ownership check",
             "No access to other employees",
             "Least privilege by role level",
             "All actions logged with source metadata",
-        ],
+        ),
+    ),
+}
+
+
+def _layered_digest():
+    return spec_digest(
+        LAYERED_TITLE,
+        LAYERED_SUBTITLE,
+        LAYERS,
+        COMPONENTS,
+        DATABASES,
+        LAYERED_ARROWS,
+        DIAGRAM_DPI,
+        DIAGRAM_FORMATS,
+        PALETTE_COLORS,
+    )
+
+
+def _role_dfd_digest(role_title, actor_lines, process_label, action_lines, db_label, audit_lines, notes):
+    return spec_digest(
+        role_title,
+        actor_lines,
+        process_label,
+        action_lines,
+        db_label,
+        audit_lines,
+        notes,
+        DIAGRAM_DPI,
+        DIAGRAM_FORMATS,
+        PALETTE_COLORS,
+    )
+
+
+def generate_layered_architecture(output_path):
+    outputs = output_paths(output_path)
+    digest = _layered_digest()
+    if is_current(outputs, digest):
+        return
+
+    # Imported lazily so up-to-date builds never load matplotlib.
+    from _diagram_primitives import (
+        add_patches,
+        draw_arrows,
+        draw_database,
+        draw_layer,
+        draw_rect,
+        make_canvas,
+        save_figure,
+    )
+
+    fig, ax = make_canvas(LAYERED_TITLE, LAYERED_SUBTITLE, figsize=(14.15, 7.9))
+
+    patches = [draw_layer(ax, *layer) for layer in LAYERS]
+    patches += [draw_rect(ax, *component) for component in COMPONENTS]
+    for database in DATABASES:
+        patches.append(draw_database(ax, *database))
+    add_patches(ax, patches)
+    draw_arrows(ax, LAYERED_ARROWS)
+
+    save_figure(fig, outputs)
+    record_digest(outputs, digest)
+
+
+def generate_role_dfd(output_path, role_title, actor_lines, process_label, action_lines, db_label, audit_lines, notes):
+    outputs = output_paths(output_path)
+    digest = _role_dfd_digest(role_title, actor_lines, process_label, action_lines, db_label, audit_lines, notes)
+    if is_current(outputs, digest):
+        return
+
+    from _diagram_primitives import (
+        add_patches,
+        draw_arrows,
+        draw_bullet_panel,
+        draw_database,
+        draw_ellipse,
+        draw_rect,
+        label_arrow,
+        make_canvas,
+        save_figure,
+    )
+
+    fig, ax = make_canvas(f"{role_title} Data Flow Diagram", "Project CLIO Role-Centric Operational Flow")
+
+    layout = DFD_GEOMETRY
+    patches = []
+
+    # External actors
+    x, y, w, h = layout["actor_box"]
+    for i, line in enumerate(actor_lines):
+        patches.append(draw_rect(ax, x, y - i * layout["actor_step"], w, h, line, fontsize=8.6))
+
+    # Role gateway and core process
+    patches.append(draw_rect(ax, *layout["role_box"], role_title))
+    patches.append(draw_ellipse(ax, *layout["process"], process_label, fontsize=9.6))
+    patches.append(draw_rect(ax, *layout["policy_box"], "RBAC + Ownership Validation", fontsize=8.7))
+
+    # Action stack
+    x, y, w, h = layout["action_box"]
+    for i, item in enumerate(action_lines):
+        patches.append(draw_rect(ax, x, y - i * layout["action_step"], w, h, item, fontsize=8.3))
+
+    # Data stores
+    db_box, audit_box = layout["databases"]
+    patches.append(draw_database(ax, *db_box, "CLIO DB", db_label))
+    patches.append(draw_database(ax, *audit_box, "Audit Logs", "Tamper-resistant"))
+
+    # Notes and audit panels (split to avoid text overlap)
+    audit_panel, notes_panel = layout["panels"]
+    patches.append(draw_bullet_panel(ax, *audit_panel, "Audit Focus", audit_lines, fontsize=8))
+    patches.append(draw_bullet_panel(ax, *notes_panel, "Security Notes", notes, fontsize=8))
+
+    add_patches(ax, patches)
+
+    arrows = (
+        layout["actor_arrows"][: len(actor_lines)]
+        + layout["core_arrows"]
+        + layout["action_arrows"][: len(action_lines)]
+        + layout["store_arrows"]
     )
+    draw_arrows(ax, [(start, end, curve) for start, end, _, curve in arrows])
+    for start, end, label, _ in arrows:
+        if label:
+            label_arrow(ax, start, end, label)
+
+    save_figure(fig, outputs)
+    record_digest(outputs, digest)
+
+
+# Pool tasks are (generator, kwargs) pairs, so one worker entry point covers
+# every diagram.
+def _dispatch(generator, kwargs):
+    generator(**kwargs)
+
+
+def main():
+    out = Path("docs/architecture")
+    out.mkdir(parents=True, exist_ok=True)
 
-    print("Generated proposal-aligned diagrams:")
-    for path in sorted(out.glob("clio-*.png")):
-        print(f"- {path}")
+    layered_path = out / "clio-system-architecture-proposal.png"
+    tasks = [(generate_layered_architecture, dict(output_path=layered_path), _layered_digest())]
+    tasks += [
+        (generate_role_dfd, dict(spec, output_path=out / name), _role_dfd_digest(**spec))
+        for name, spec in ROLE_DFDS.items()
+    ]
+    # Checked here rather than only in the workers: an up-to-date build then
+    # never pays for starting interpreters.
+    stale, current = [], []
+    for generator, kwargs, digest in tasks:
+        outputs = output_paths(kwargs["output_path"])
+        if is_current(outputs, digest):
+            current += outputs
+        else:
+            stale.append((generator, kwargs))
+
+    # The six figures share nothing, so each one renders in its own worker.
+    # With a single CPU (or a single stale figure) a pool only adds the process
+    # and pickling round trips.
+    processes = min(len(stale), os.cpu_count() or 1)
+    if processes <= 1:
+        for task in stale:
+            _dispatch(*task)
+    else:
+        # Spawned workers start clean and import matplotlib themselves rather
+        # than inheriting whatever the parent (e.g. gen_diagrams.py after the
+        # architecture overview) has loaded.
+        with multiprocessing.get_context("spawn").Pool(processes=processes) as pool:
+            pool.starmap(_dispatch, stale)
+
+    if stale:
+        generated = [path for _, kwargs in stale for path in output_paths(kwargs["output_path"])]
+        print(f"Generated: {', '.join(map(str, generated))}")
+    if current:
+        print(f"Up to date: {', '.join(map(str, current))}")
 
 
 if __name__ == "__main__":